@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import tornado.web
+from sqlalchemy.exc import NoResultFound
+
+from img_utils import save_image, make_thumbnail
+from models import ImageMetadataDAO
+
+IMG_PATH = './img'
+THUMB_PATH = './img/thumbs'
+THUMB_SIZES = (128, 256, 512)
+MAX_PAGE_SIZE = 100
+
+# Pipeline operations and whether they take a "factor" argument
+EDIT_OPERATIONS = {
+    "greyscale": False,
+    "sepia": False,
+    "sketch": False,
+    "invert": False,
+    "brightness": True,
+    "contrast": True,
+    "restore": False,
+}
+
+def serialize_metadata(image_metadata):
+    """
+    Convert an ImageMetadataModel into a JSON serializable dict.
+
+    Parameters:
+    - image_metadata: The ImageMetadataModel to convert.
+
+    Returns:
+    - dict: The metadata including the urls of the image and its thumbnail.
+    """
+    return {
+        "id": image_metadata.id,
+        "title": image_metadata.title,
+        "description": image_metadata.description,
+        "timestamp": image_metadata.timestamp.isoformat() if image_metadata.timestamp else None,
+        "tags": [tag.strip() for tag in (image_metadata.tags or "").split(",") if tag.strip()],
+        "url": f"/img/{os.path.basename(image_metadata.filepath)}",
+        "thumbnail_url": f"/api/images/{image_metadata.id}/thumbnail",
+    }
+
+def parse_pipeline(steps):
+    """
+    Validate an edit pipeline submitted by a client.
+
+    Parameters:
+    - steps: List of {"op": <name>, "factor": <float>} dicts, applied in order.
+
+    Returns:
+    - list: (op, factor) tuples, factor is None for operations that do not take one.
+
+    Raises:
+    - ValueError: If the pipeline is malformed or contains an unknown operation.
+    """
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("'steps' must be a non-empty list")
+    pipeline = []
+    for step in steps:
+        op = step.get("op") if isinstance(step, dict) else None
+        if not isinstance(op, str) or op not in EDIT_OPERATIONS:
+            raise ValueError(f"Unknown operation: {op!r}")
+        factor = None
+        if EDIT_OPERATIONS[op]:
+            try:
+                factor = float(step["factor"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Operation {op!r} requires a numeric 'factor'")
+            if not math.isfinite(factor) or factor <= 0:
+                raise ValueError(f"Operation {op!r} requires a positive finite 'factor'")
+        pipeline.append((op, factor))
+    return pipeline
+
+def decode_and_save(image_bytes):
+    """
+    Decode an uploaded image and save it to the image folder.
+
+    Parameters:
+    - image_bytes: The raw bytes of the uploaded file.
+
+    Returns:
+    - save_path: The path where the image is saved, or None if the bytes are not a valid image.
+    """
+    cv2_img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if cv2_img is None:
+        return None
+    return save_image(cv2_img, IMG_PATH)
+
+
+class ApiMixin:
+    """
+    Shared helpers for the /api/ handlers.
+    Blocking database and image work is pushed onto the application's thread pool so the event loop keeps serving requests.
+    """
+    def run_blocking(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def get_image_or_404(self, image_id):
+        try:
+            return await self.run_blocking(self.dao.get_image_metadata, int(image_id))
+        except (NoResultFound, OverflowError):
+            # ids too large for the database cannot exist either
+            raise tornado.web.HTTPError(404, reason="Image not found")
+
+    def write_error(self, status_code, **kwargs):
+        # Client supplied details go in the HTTPError log_message, the reason phrase must stay safe for the status line
+        exception = kwargs.get("exc_info", (None, None, None))[1]
+        message = getattr(exception, "log_message", None) if status_code < 500 else None
+        self.finish({"error": message or self._reason})
+
+
+class BaseHandler(ApiMixin, tornado.web.RequestHandler):
+    """
+    Base class for the JSON API handlers.
+    """
+    def initialize(self, dao, executor):
+        self.dao = dao
+        self.executor = executor
+
+
+class ImagesHandler(BaseHandler):
+    """
+    GET  /api/images - paginated listing and search (?page=, ?per_page=, ?q=, ?tag=)
+    POST /api/images - upload a capture as multipart form data (image, title, description, tags)
+    """
+    async def get(self):
+        try:
+            page = max(int(self.get_query_argument("page", "1")), 1)
+            per_page = min(max(int(self.get_query_argument("per_page", "20")), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="'page' and 'per_page' must be integers")
+        query = self.get_query_argument("q", None)
+        tag = self.get_query_argument("tag", None)
+
+        total, images = await self.run_blocking(
+            self.dao.search_image_metadata, query, tag, (page - 1) * per_page, per_page
+        )
+        self.write({
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "items": [serialize_metadata(image) for image in images],
+        })
+
+    async def post(self):
+        files = self.request.files.get("image")
+        title = self.get_body_argument("title", "").strip()
+        description = self.get_body_argument("description", "").strip()
+        tags = [tag.strip() for value in self.get_body_arguments("tags") for tag in value.split(",") if tag.strip()]
+        # Same required fields as the details form on the scan page
+        if not files:
+            raise tornado.web.HTTPError(400, reason="An 'image' file is required")
+        if not title or not description or not tags:
+            raise tornado.web.HTTPError(400, reason="Title, description and tags are required")
+
+        save_path = await self.run_blocking(decode_and_save, files[0]["body"])
+        if save_path is None:
+            raise tornado.web.HTTPError(400, reason="Uploaded file is not a valid image")
+
+        image_metadata = await self.run_blocking(self.dao.add_image_metadata, title, description, save_path, tags)
+        self.set_status(201)
+        self.set_header("Location", f"/api/images/{image_metadata.id}")
+        self.write(serialize_metadata(image_metadata))
+
+
+class ImageHandler(BaseHandler):
+    """
+    GET /api/images/<id> - metadata for a single image
+    """
+    async def get(self, image_id):
+        image_metadata = await self.get_image_or_404(image_id)
+        self.write(serialize_metadata(image_metadata))
+
+
+class EditHandler(BaseHandler):
+    """
+    POST /api/images/<id>/edits - apply an edit pipeline, e.g.
+    {"steps": [{"op": "sepia"}, {"op": "brightness", "factor": 1.2}]}
+    """
+    # Each step reads the image and writes it back, so pipelines submitted through the API on the same image
+    # must not interleave. A fixed set of striped locks keeps memory bounded. This only serialises edits
+    # within the API process, edits from the streamlit edit page are not covered.
+    edit_locks = tuple(threading.Lock() for _ in range(64))
+
+    def apply_pipeline(self, image_metadata, pipeline):
+        with self.edit_locks[image_metadata.id % len(self.edit_locks)]:
+            for op, factor in pipeline:
+                if op == "greyscale":
+                    self.dao.apply_greyscale_effect(image_metadata.id)
+                elif op == "sepia":
+                    self.dao.apply_sepia_effect(image_metadata.filepath)
+                elif op == "sketch":
+                    self.dao.apply_sketch_effect(image_metadata.filepath)
+                elif op == "invert":
+                    self.dao.apply_invert_effect(image_metadata.filepath)
+                elif op == "brightness":
+                    self.dao.adjust_brightness(image_metadata.filepath, factor)
+                elif op == "contrast":
+                    self.dao.adjust_contrast(image_metadata.filepath, factor)
+                elif op == "restore":
+                    self.dao.restore_original(image_metadata.filepath)
+
+    async def post(self, image_id):
+        try:
+            body = json.loads(self.request.body or b"{}")
+            pipeline = parse_pipeline(body.get("steps") if isinstance(body, dict) else None)
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, str(e), reason="Invalid edit pipeline")
+
+        image_metadata = await self.get_image_or_404(image_id)
+        if not os.path.exists(image_metadata.filepath):
+            raise tornado.web.HTTPError(404, reason="Image file not found")
+        try:
+            await self.run_blocking(self.apply_pipeline, image_metadata, pipeline)
+        except FileNotFoundError:
+            # the file was deleted while the pipeline was queued
+            raise tornado.web.HTTPError(404, reason="Image file not found")
+        self.write(serialize_metadata(image_metadata))
+
+
+class ImageFileHandler(tornado.web.StaticFileHandler):
+    """
+    Serves image files with ETag/conditional GET and Range support.
+    Images are edited in place, so the ETag is derived from the file's mtime and size instead of
+    StaticFileHandler's content hash, which is cached for the lifetime of the process.
+    """
+    def compute_etag(self):
+        stat = os.stat(self.absolute_path)
+        return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+    def set_extra_headers(self, path):
+        # Let clients cache the file but always revalidate, a 304 is cheap
+        self.set_header("Cache-Control", "no-cache")
+
+
+class ThumbnailHandler(ApiMixin, ImageFileHandler):
+    """
+    GET /api/images/<id>/thumbnail?size=<128|256|512> - cached JPEG thumbnail of an image
+    """
+    def initialize(self, path, dao, executor):
+        super().initialize(path)
+        self.dao = dao
+        self.executor = executor
+
+    async def get(self, image_id, include_body=True):
+        try:
+            size = int(self.get_query_argument("size", str(THUMB_SIZES[1])))
+        except ValueError:
+            size = None
+        if size not in THUMB_SIZES:
+            raise tornado.web.HTTPError(400, reason=f"'size' must be one of {THUMB_SIZES}")
+
+        image_metadata = await self.get_image_or_404(image_id)
+        try:
+            filename = await self.run_blocking(make_thumbnail, image_metadata.filepath, size, self.root)
+        except FileNotFoundError:
+            raise tornado.web.HTTPError(404, reason="Image file not found")
+        await super().get(filename, include_body)
+
+
+def make_app(database_url='sqlite:///image_metadata.db', workers=8):
+    """
+    Create the tornado application exposing the image archive.
+
+    Parameters:
+    - database_url: The database the ImageMetadataDAO connects to.
+    - workers: Number of threads used for database and image processing work.
+
+    Returns:
+    - tornado.web.Application: The configured application.
+    """
+    os.makedirs(THUMB_PATH, exist_ok=True)
+    context = dict(dao=ImageMetadataDAO(database_url), executor=ThreadPoolExecutor(max_workers=workers))
+    return tornado.web.Application([
+        (r"/api/images", ImagesHandler, context),
+        (r"/api/images/(\d+)", ImageHandler, context),
+        (r"/api/images/(\d+)/edits", EditHandler, context),
+        (r"/api/images/(\d+)/thumbnail", ThumbnailHandler, dict(path=THUMB_PATH, **context)),
+        (r"/img/(.*)", ImageFileHandler, dict(path=IMG_PATH)),
+    ])
+
+async def main():
+    parser = argparse.ArgumentParser(description="Headless HTTP API for the webcam image archive")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--database-url", default='sqlite:///image_metadata.db')
+    parser.add_argument("--workers", type=int, default=8, help="threads used for database and image processing work")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, args.workers)
+    app.listen(args.port, address=args.host)
+    print(f"Serving API on http://{args.host}:{args.port}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
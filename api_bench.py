@@ -0,0 +1,128 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import requests
+
+# Benchmarks a locally running api.py instance, start it first with: python api.py
+
+thread_local = threading.local()
+
+def get_session():
+    """
+    Return a requests session for the current thread so connections are kept alive between requests.
+    """
+    if not hasattr(thread_local, "session"):
+        thread_local.session = requests.Session()
+    return thread_local.session
+
+def timed_request(send):
+    """
+    Perform a single request.
+
+    Parameters:
+    - send: Function taking a requests session and returning the response.
+
+    Returns:
+    - (latency, ok): The latency in seconds and whether the response was a 2xx or 304.
+    """
+    start = time.perf_counter()
+    try:
+        response = send(get_session())
+        response.content
+        ok = response.ok or response.status_code == 304
+    except requests.RequestException:
+        ok = False
+    return time.perf_counter() - start, ok
+
+def percentile(sorted_values, pct):
+    """
+    Return the pct-th percentile of an already sorted list, using the nearest rank.
+    """
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_benchmark(label, send, num_requests, concurrency):
+    """
+    Perform num_requests requests using send from concurrency threads and report throughput and latency.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(lambda _: timed_request(send), range(num_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    print(label)
+    print(f"  {num_requests} requests, concurrency {concurrency}, {errors} errors")
+    print(f"  {num_requests / elapsed:.1f} requests/s")
+    print(f"  p50 {percentile(latencies, 50) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms")
+
+def benchmark_get(url, num_requests, concurrency, headers=None):
+    label = f"GET {url}{' (conditional)' if headers else ''}"
+    run_benchmark(label, lambda session: session.get(url, headers=headers or {}), num_requests, concurrency)
+
+def benchmark_upload(base_url, num_requests, concurrency):
+    """
+    Benchmark POST /api/images with a webcam sized capture. Every request adds an image to the archive.
+    """
+    _, png = cv2.imencode(".png", np.random.randint(0, 256, (480, 640, 3), dtype=np.uint8))
+    image_bytes = png.tobytes()
+    data = {"title": "Benchmark", "description": "Uploaded by api_bench.py", "tags": "benchmark"}
+    run_benchmark(
+        f"POST {base_url}/api/images",
+        lambda session: session.post(f"{base_url}/api/images", files={"image": ("capture.png", image_bytes)}, data=data),
+        num_requests, concurrency
+    )
+
+def benchmark_edit(base_url, image_id, num_requests, concurrency):
+    """
+    Benchmark POST /api/images/<id>/edits with a pipeline that rewrites the image without changing it.
+    """
+    url = f"{base_url}/api/images/{image_id}/edits"
+    pipeline = {"steps": [{"op": "brightness", "factor": 1.0}, {"op": "contrast", "factor": 1.0}]}
+    run_benchmark(f"POST {url}", lambda session: session.post(url, json=pipeline), num_requests, concurrency)
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for the image archive API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="base url of the running API")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--upload", action="store_true", help="also benchmark uploads, this adds --requests images to the archive")
+    parser.add_argument("--edit", action="store_true", help="also benchmark edit pipelines on the newest image")
+    args = parser.parse_args()
+
+    listing = requests.get(f"{args.url}/api/images?per_page=1")
+    listing.raise_for_status()
+    endpoints = [f"{args.url}/api/images", f"{args.url}/api/images?q=webcam"]
+    items = listing.json()["items"]
+    if items:
+        endpoints += [f"{args.url}/api/images/{items[0]['id']}", f"{args.url}{items[0]['thumbnail_url']}", f"{args.url}{items[0]['url']}"]
+    else:
+        print("No images in the archive, only the listing endpoints will be benchmarked.")
+
+    for endpoint in endpoints:
+        benchmark_get(endpoint, args.requests, args.concurrency)
+
+    # Revalidation of cached files should be answered with a bodiless 304
+    for endpoint in endpoints[3:]:
+        etag = requests.get(endpoint).headers.get("Etag")
+        if etag:
+            benchmark_get(endpoint, args.requests, args.concurrency, {"If-None-Match": etag})
+
+    if args.upload:
+        benchmark_upload(args.url, args.requests, args.concurrency)
+
+    if args.edit:
+        # list again, the upload benchmark may have filled an empty archive
+        items = requests.get(f"{args.url}/api/images?per_page=1").json()["items"]
+        if items:
+            benchmark_edit(args.url, items[0]["id"], args.requests, args.concurrency)
+        else:
+            print("No images in the archive, skipping the edit benchmark.")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 from models import ImageMetadataDAO
+from img_utils import parse_thumbnail_name
 
 # Initialize the Data Access Object
 dao = ImageMetadataDAO()
@@ -33,4 +34,15 @@ for file in files_to_delete:
     print(f"Deleting file: {file_path}")
     os.remove(file_path)
 
+# Delete cached thumbnails of images that are no longer in the database
+thumb_directory = os.path.join(img_directory, 'thumbs')
+db_stems = {os.path.splitext(fp)[0] for fp in db_filepaths}
+if os.path.isdir(thumb_directory):
+    for file in os.listdir(thumb_directory):
+        parsed = parse_thumbnail_name(file)
+        if parsed is not None and parsed[0] not in db_stems:
+            file_path = os.path.join(thumb_directory, file)
+            print(f"Deleting thumbnail: {file_path}")
+            os.remove(file_path)
+
 print("Cleanup complete. Files not found in the database have been deleted.")
\ No newline at end of file
@@ -0,0 +1,131 @@
+import cv2
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from PIL import Image
+
+THUMBNAIL_NAME = re.compile(r"^(?P<stem>.+)-(?P<size>\d+)-[0-9a-f]+-[0-9a-f]+\.jpg$")
+
+def save_image(cv2_img, base_path='./img'):
+    """
+    Save the OpenCV image to a file.
+
+    Parameters:
+    - cv2_img: The OpenCV image to be saved.
+    - base_path: The base path where the image will be saved. Default is './img'.
+
+    Returns:
+    - save_path: The path where the image is saved.
+    """
+    if not os.path.exists(base_path):
+        os.makedirs(base_path)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    filename = f"img_{timestamp}.png"
+    save_path = os.path.join(base_path, filename)
+    cv2.imwrite(save_path, cv2_img)
+    cv2.imwrite(f"{save_path[:-4]}-ORIGINAL.png", cv2_img)
+    return save_path
+
+def save_image_atomic(img, filepath, **save_kwargs):
+    """
+    Save a PIL image by writing a temporary file and renaming it over filepath,
+    so concurrent readers see either the old or the new image but never a partially written one.
+
+    Parameters:
+    - img: The PIL image to be saved.
+    - filepath: The path the image is saved to. The format is taken from its extension unless given in save_kwargs.
+    - save_kwargs: Extra arguments passed on to Image.save.
+    """
+    root, ext = os.path.splitext(filepath)
+    tmp_path = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+    try:
+        img.save(tmp_path, **save_kwargs)
+        replace_file(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def replace_file(src, dst, attempts=20, delay=0.05):
+    """
+    Rename src over dst, retrying briefly if dst is in use.
+
+    On Windows os.replace fails with PermissionError while another handle has dst open,
+    e.g. while the API or streamlit is serving the image, so the rename is retried for up to attempts * delay seconds.
+    """
+    for attempt in range(attempts):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(delay)
+
+def make_thumbnail(filepath, size, thumb_path='./img/thumbs'):
+    """
+    Create (or reuse) a JPEG thumbnail of an image.
+
+    Thumbnails are cached per version of the source image: the filename includes the source's
+    mtime and size, so an image rewritten by the effect functions gets a new thumbnail on the next request.
+    Older versions of the thumbnail are deleted once the new one has been written.
+
+    Parameters:
+    - filepath: Path of the source image.
+    - size: Maximum width/height of the thumbnail in pixels.
+    - thumb_path: Directory where thumbnails are cached. Default is './img/thumbs'.
+
+    Returns:
+    - filename: The thumbnail filename relative to thumb_path.
+    """
+    if not os.path.exists(thumb_path):
+        os.makedirs(thumb_path, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    with open(filepath, "rb") as f:
+        # stat the open file rather than the path, so the version in the filename always matches the pixels read
+        stat = os.fstat(f.fileno())
+        filename = f"{stem}-{size}-{stat.st_mtime_ns:x}-{stat.st_size:x}.jpg"
+        save_path = os.path.join(thumb_path, filename)
+        if not os.path.exists(save_path):
+            with Image.open(f) as img:
+                img.thumbnail((size, size))
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("RGB")
+                save_image_atomic(img, save_path, format="JPEG", quality=85)
+            remove_stale_thumbnails(thumb_path, stem, size, keep=filename)
+    return filename
+
+def remove_stale_thumbnails(thumb_path, stem, size=None, keep=None):
+    """
+    Delete cached thumbnails of an image.
+
+    Parameters:
+    - thumb_path: Directory where thumbnails are cached.
+    - stem: Filename of the source image without its extension.
+    - size: Only delete thumbnails of this size. Default is all sizes.
+    - keep: Thumbnail filename that must not be deleted.
+    """
+    for filename in os.listdir(thumb_path):
+        parsed = parse_thumbnail_name(filename)
+        if parsed is None or filename == keep or parsed[0] != stem or (size is not None and parsed[1] != size):
+            continue
+        try:
+            os.remove(os.path.join(thumb_path, filename))
+        except OSError:
+            # already removed by a concurrent request, or still open on Windows; the next pass will get it
+            pass
+
+def parse_thumbnail_name(filename):
+    """
+    Split a thumbnail filename created by make_thumbnail into its parts.
+
+    Returns:
+    - (stem, size): The source image's filename without extension and the thumbnail size,
+      or None if filename is not a thumbnail (e.g. a temporary file of a thumbnail being written).
+    """
+    match = THUMBNAIL_NAME.match(filename)
+    if match is None:
+        return None
+    return match.group("stem"), int(match.group("size"))
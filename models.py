@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, create_engine, or_, func, literal
 from sqlalchemy.orm import declarative_base, sessionmaker
 from pydantic import BaseModel
 from datetime import datetime
@@ -6,10 +6,17 @@ from typing import List
 from PIL import Image, ImageEnhance, ImageOps, ImageFilter
 import numpy as np
 import os
+from img_utils import save_image_atomic
 
 Base = declarative_base()
 SessionLocal = sessionmaker()
 
+def escape_like(value: str):
+    """
+    Escapes the LIKE wildcards in user input so it is matched literally. Use together with escape='\\'.
+    """
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 class ImageMetadataModel(Base):
     """
     Represents the image metadata table in the database.
@@ -67,6 +74,7 @@ class ImageMetadataDAO:
             )
             session.add(new_image_metadata)
             session.commit()
+            session.refresh(new_image_metadata)  # reload the generated id so it is usable once the session closes
             return new_image_metadata
 
     def get_all_image_metadata(self):
@@ -79,6 +87,36 @@ class ImageMetadataDAO:
         with SessionLocal() as session:
             return session.query(ImageMetadataModel).all()
 
+    def search_image_metadata(self, query: str = None, tag: str = None, offset: int = 0, limit: int = 20):
+        """
+        Fetches a page of image metadata, optionally filtered by a search term and/or tag.
+
+        Args:
+            query (str): Text matched against the title, description and tags.
+            tag (str): Tag the image must contain.
+            offset (int): Number of entries to skip.
+            limit (int): Maximum number of entries to return.
+
+        Returns:
+            Tuple[int, List[ImageMetadataModel]]: The total number of matches and the requested page, newest first.
+        """
+        with SessionLocal() as session:
+            images = session.query(ImageMetadataModel)
+            if query:
+                pattern = f"%{escape_like(query)}%"
+                images = images.filter(or_(
+                    ImageMetadataModel.title.ilike(pattern, escape='\\'),
+                    ImageMetadataModel.description.ilike(pattern, escape='\\'),
+                    ImageMetadataModel.tags.ilike(pattern, escape='\\')
+                ))
+            if tag and tag.strip():
+                # Tags are stored joined with either ', ' or ',', normalise to ',tag1,tag2,' so whole tags can be matched
+                normalised_tags = literal(',') + func.replace(ImageMetadataModel.tags, ', ', ',', type_=String) + literal(',')
+                images = images.filter(normalised_tags.ilike(f"%,{escape_like(tag.strip())},%", escape='\\'))
+            total = images.count()
+            page = images.order_by(ImageMetadataModel.id.desc()).offset(offset).limit(limit).all()
+            return total, page
+
     def update_image_metadata(self, id: int, title: str, description: str, tags: List[str]):
         """
         Updates image metadata in the database.
@@ -134,7 +172,7 @@ class ImageMetadataDAO:
             try:
                 img = Image.open(image_metadata.filepath)
                 img = img.convert("L")
-                img.save(image_metadata.filepath)
+                save_image_atomic(img, image_metadata.filepath)
             except Exception as e:
                 print(f"Error applying greyscale effect: {e}")
                 raise e
@@ -146,7 +184,7 @@ class ImageMetadataDAO:
             sepia = np.array(img)
             sepia = Image.fromarray(sepia)
             sepia = ImageOps.colorize(sepia, (107, 74, 47), (207, 190, 183))
-            sepia.save(filepath)
+            save_image_atomic(sepia, filepath)
         except Exception as e:
             print(f"Error applying sepia effect: {e}")
             raise e
@@ -155,7 +193,7 @@ class ImageMetadataDAO:
         try:
             img = Image.open(filepath)
             img = ImageOps.invert(img)
-            img.save(filepath)
+            save_image_atomic(img, filepath)
         except Exception as e:
             print(f"Error applying invert effect: {e}")
             raise e
@@ -166,7 +204,7 @@ class ImageMetadataDAO:
             img = img.convert("L")  # Convert to grayscale
             edges = img.filter(ImageFilter.FIND_EDGES)
             sketch = ImageOps.invert(edges)
-            sketch.save(filepath)
+            save_image_atomic(sketch, filepath)
         except Exception as e:
             print(f"Error applying sketch effect: {e}")
             raise e
@@ -176,7 +214,7 @@ class ImageMetadataDAO:
             img = Image.open(filepath)
             enhancer = ImageEnhance.Brightness(img)
             img = enhancer.enhance(factor)
-            img.save(filepath)
+            save_image_atomic(img, filepath)
         except Exception as e:
             print(f"Error adjusting brightness: {e}")
             raise e
@@ -186,7 +224,7 @@ class ImageMetadataDAO:
             img = Image.open(filepath)
             enhancer = ImageEnhance.Contrast(img)
             img = enhancer.enhance(factor)
-            img.save(filepath)
+            save_image_atomic(img, filepath)
         except Exception as e:
             print(f"Error adjusting contrast: {e}")
             raise e
@@ -196,7 +234,7 @@ class ImageMetadataDAO:
             original_path = f"{filepath[:-4]}-ORIGINAL.png"
             if os.path.exists(original_path):
                 img = Image.open(original_path)
-                img.save(filepath)
+                save_image_atomic(img, filepath)
         except Exception as e:
             print(f"Error restoring original image: {e}")
             raise e
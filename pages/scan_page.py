@@ -1,34 +1,13 @@
 import streamlit as st
 import cv2
 import numpy as np
-import os
-from datetime import datetime
 from components import details_form, capture_form
+from img_utils import save_image
 from models import ImageMetadataDAO
 
 # Instantiate the DAO for database operations
 metadata_dao = ImageMetadataDAO()
 
-def save_image(cv2_img, base_path='./img'):
-    """
-    Save the OpenCV image to a file.
-
-    Parameters:
-    - cv2_img: The OpenCV image to be saved.
-    - base_path: The base path where the image will be saved. Default is './img'.
-
-    Returns:
-    - save_path: The path where the image is saved.
-    """
-    if not os.path.exists(base_path):
-        os.makedirs(base_path)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    filename = f"img_{timestamp}.png"
-    save_path = os.path.join(base_path, filename)
-    cv2.imwrite(save_path, cv2_img)
-    cv2.imwrite(f"{save_path[:-4]}-ORIGINAL.png", cv2_img)
-    return save_path
-
 def submit_details_cb():
     """
     Callback function for submitting image details.
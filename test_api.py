@@ -0,0 +1,203 @@
+import json
+import os
+import tempfile
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+from tornado.testing import AsyncHTTPTestCase
+
+from api import make_app, parse_pipeline
+
+def test_parse_pipeline_accepts_valid_steps():
+    steps = [{"op": "sepia"}, {"op": "brightness", "factor": 1.2}, {"op": "contrast", "factor": "0.8"}]
+
+    assert parse_pipeline(steps) == [("sepia", None), ("brightness", 1.2), ("contrast", 0.8)]
+
+@pytest.mark.parametrize("steps", [
+    None,
+    [],
+    {"op": "sepia"},
+    ["sepia"],
+    [{"op": "blur"}],
+    [{"op": []}],
+    [{"op": {"name": "sepia"}}],
+])
+def test_parse_pipeline_rejects_malformed_steps(steps):
+    with pytest.raises(ValueError):
+        parse_pipeline(steps)
+
+@pytest.mark.parametrize("factor", [None, "bright", [], 0, -1, "nan", "inf", float("-inf")])
+def test_parse_pipeline_rejects_invalid_factors(factor):
+    with pytest.raises(ValueError):
+        parse_pipeline([{"op": "brightness", "factor": factor}])
+
+def test_parse_pipeline_requires_factor():
+    with pytest.raises(ValueError):
+        parse_pipeline([{"op": "contrast"}])
+
+
+def multipart_body(fields, image_bytes=None):
+    """
+    Encode form fields and an optional image file as multipart/form-data.
+    """
+    boundary = "test-boundary"
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    if image_bytes is not None:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="capture.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n'.encode() + image_bytes + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+class ApiTest(AsyncHTTPTestCase):
+    """
+    Exercises the HTTP endpoints of make_app against a temporary database and image folder.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        # the API stores images relative to the working directory
+        os.chdir(self.tmp_dir.name)
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def get_app(self):
+        return make_app(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}", workers=2)
+
+    def upload(self, title="Cat", tags="cat, webcam", image_bytes=None):
+        if image_bytes is None:
+            gradient = np.tile(np.arange(256, dtype=np.uint8), (64, 1))
+            image_bytes = cv2.imencode(".png", cv2.merge([gradient, gradient[:, ::-1], gradient]))[1].tobytes()
+        body, headers = multipart_body({"title": title, "description": "A test capture", "tags": tags}, image_bytes)
+        return self.fetch("/api/images", method="POST", body=body, headers=headers)
+
+    def edit(self, image_id, steps):
+        return self.fetch(f"/api/images/{image_id}/edits", method="POST", body=json.dumps({"steps": steps}))
+
+    def assert_json_error(self, response, code):
+        self.assertEqual(response.code, code)
+        self.assertTrue(response.headers["Content-Type"].startswith("application/json"))
+        self.assertIn("error", json.loads(response.body))
+
+    def test_upload(self):
+        response = self.upload()
+
+        self.assertEqual(response.code, 201)
+        image = json.loads(response.body)
+        self.assertEqual(response.headers["Location"], f"/api/images/{image['id']}")
+        self.assertEqual(image["tags"], ["cat", "webcam"])
+        self.assertEqual(self.fetch(image["url"]).code, 200)
+
+    def test_upload_rejects_invalid_image(self):
+        self.assert_json_error(self.upload(image_bytes=b"not an image"), 400)
+
+    def test_upload_requires_image_and_details(self):
+        body, headers = multipart_body({"title": "Cat", "description": "A cat", "tags": "cat"})
+        self.assert_json_error(self.fetch("/api/images", method="POST", body=body, headers=headers), 400)
+        self.assert_json_error(self.upload(tags=""), 400)
+
+    def test_list_and_search(self):
+        ids = [json.loads(self.upload(title=f"Image {i}", tags=tags).body)["id"]
+               for i, tags in enumerate(["cat", "concatenate, dog", "dog"])]
+
+        listing = json.loads(self.fetch("/api/images?page=2&per_page=2").body)
+        self.assertEqual(listing["total"], 3)
+        self.assertEqual([image["id"] for image in listing["items"]], [ids[0]])
+
+        tagged = json.loads(self.fetch("/api/images?tag=cat").body)
+        self.assertEqual([image["id"] for image in tagged["items"]], [ids[0]])
+
+        searched = json.loads(self.fetch("/api/images?q=image%202").body)
+        self.assertEqual([image["id"] for image in searched["items"]], [ids[2]])
+
+        self.assert_json_error(self.fetch("/api/images?page=first"), 400)
+
+    def test_get_image(self):
+        image = json.loads(self.upload().body)
+
+        response = self.fetch(f"/api/images/{image['id']}")
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(json.loads(response.body)["title"], "Cat")
+
+    def test_unknown_and_overflowing_ids_are_not_found(self):
+        for image_id in ("12345", "999999999999999999999999"):
+            self.assert_json_error(self.fetch(f"/api/images/{image_id}"), 404)
+            self.assert_json_error(self.fetch(f"/api/images/{image_id}/thumbnail"), 404)
+            self.assert_json_error(self.edit(image_id, [{"op": "invert"}]), 404)
+
+    def test_thumbnail(self):
+        image = json.loads(self.upload().body)
+
+        response = self.fetch(f"{image['thumbnail_url']}?size=128")
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.headers["Content-Type"], "image/jpeg")
+
+    def test_thumbnail_rejects_unknown_size(self):
+        image = json.loads(self.upload().body)
+
+        self.assert_json_error(self.fetch(f"{image['thumbnail_url']}?size=7"), 400)
+
+    def test_conditional_get_returns_not_modified(self):
+        image = json.loads(self.upload().body)
+
+        for url in (image["url"], image["thumbnail_url"]):
+            etag = self.fetch(url).headers["Etag"]
+            response = self.fetch(url, headers={"If-None-Match": etag})
+            self.assertEqual(response.code, 304)
+            self.assertEqual(response.body, b"")
+
+    def test_range_request_returns_partial_content(self):
+        image = json.loads(self.upload().body)
+        full = self.fetch(image["url"]).body
+
+        response = self.fetch(image["url"], headers={"Range": "bytes=0-9"})
+
+        self.assertEqual(response.code, 206)
+        self.assertEqual(response.headers["Content-Range"], f"bytes 0-9/{len(full)}")
+        self.assertEqual(response.body, full[:10])
+
+    def test_edit_pipeline(self):
+        image = json.loads(self.upload().body)
+
+        response = self.edit(image["id"], [{"op": "greyscale"}, {"op": "brightness", "factor": 1.2}])
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(Image.open(os.path.join("img", os.path.basename(image["url"]))).mode, "L")
+
+    def test_edit_rejects_invalid_pipeline(self):
+        image = json.loads(self.upload().body)
+
+        self.assert_json_error(self.edit(image["id"], [{"op": "brightness", "factor": "nan"}]), 400)
+        self.assert_json_error(self.fetch(f"/api/images/{image['id']}/edits", method="POST", body="nope"), 400)
+
+    def test_missing_file_is_not_found(self):
+        image = json.loads(self.upload().body)
+        os.remove(os.path.join("img", os.path.basename(image["url"])))
+
+        self.assert_json_error(self.edit(image["id"], [{"op": "invert"}]), 404)
+        self.assert_json_error(self.fetch(image["thumbnail_url"]), 404)
+
+    def test_etags_change_after_edit(self):
+        image = json.loads(self.upload().body)
+        etags = {url: self.fetch(url).headers["Etag"] for url in (image["url"], image["thumbnail_url"])}
+
+        self.assertEqual(self.edit(image["id"], [{"op": "greyscale"}]).code, 200)
+
+        for url, etag in etags.items():
+            response = self.fetch(url, headers={"If-None-Match": etag})
+            self.assertEqual(response.code, 200)
+            self.assertNotEqual(response.headers["Etag"], etag)
+        self.assertEqual(len(os.listdir(os.path.join("img", "thumbs"))), 1)
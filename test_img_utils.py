@@ -0,0 +1,26 @@
+import os
+import pytest
+from PIL import Image
+from img_utils import save_image_atomic, make_thumbnail
+
+def test_save_image_atomic_removes_temp_file_on_failure(tmp_path):
+    filepath = tmp_path / "img.png"
+    Image.new("RGB", (8, 8)).save(filepath)
+
+    with pytest.raises(Exception):
+        save_image_atomic(Image.new("RGB", (8, 8)), str(filepath), format="NOT-A-FORMAT")
+
+    assert os.listdir(tmp_path) == ["img.png"]
+
+def test_make_thumbnail_removes_previous_versions(tmp_path):
+    filepath = tmp_path / "img.png"
+    thumb_path = tmp_path / "thumbs"
+    Image.new("RGB", (64, 64), "red").save(filepath)
+    first_128 = make_thumbnail(str(filepath), 128, str(thumb_path))
+    first_256 = make_thumbnail(str(filepath), 256, str(thumb_path))
+
+    save_image_atomic(Image.new("L", (32, 32)), str(filepath))
+    second_128 = make_thumbnail(str(filepath), 128, str(thumb_path))
+
+    assert second_128 != first_128
+    assert sorted(os.listdir(thumb_path)) == sorted([first_256, second_128])
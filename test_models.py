@@ -0,0 +1,46 @@
+import pytest
+from models import ImageMetadataDAO
+
+@pytest.fixture
+def dao(tmp_path):
+    return ImageMetadataDAO(f"sqlite:///{tmp_path / 'test.db'}")
+
+def test_search_matches_whole_tags(dao):
+    cat = dao.add_image_metadata("Cat", "A cat", "./img/cat.png", ["cat"])
+    dao.add_image_metadata("Other", "Something else", "./img/other.png", ["concatenate", "dog"])
+
+    total, images = dao.search_image_metadata(tag="cat")
+
+    assert total == 1
+    assert [image.id for image in images] == [cat.id]
+
+def test_search_matches_tags_saved_by_update(dao):
+    image = dao.add_image_metadata("Dog", "A dog", "./img/dog.png", ["dog"])
+    dao.update_image_metadata(image.id, "Dog", "A dog", ["dog", "cat"])  # stored as "dog,cat"
+
+    assert dao.search_image_metadata(tag="cat")[0] == 1
+    assert dao.search_image_metadata(tag="CAT")[0] == 1
+
+def test_search_query_treats_wildcards_literally(dao):
+    dao.add_image_metadata("Plain", "No wildcards", "./img/plain.png", ["webcam"])
+    percent = dao.add_image_metadata("100% done", "Finished", "./img/done.png", ["webcam"])
+
+    assert dao.search_image_metadata(query="%")[0] == 1
+    assert dao.search_image_metadata(query="_")[0] == 0
+    assert dao.search_image_metadata(query="100%")[1][0].id == percent.id
+
+def test_search_query_matches_title_description_and_tags(dao):
+    dao.add_image_metadata("Sunset", "Evening sky", "./img/a.png", ["outdoor"])
+    dao.add_image_metadata("Desk", "My sunset poster", "./img/b.png", ["indoor"])
+    dao.add_image_metadata("Garden", "Flowers", "./img/c.png", ["sunset"])
+    dao.add_image_metadata("Kitchen", "Breakfast", "./img/d.png", ["indoor"])
+
+    assert dao.search_image_metadata(query="SUNSET")[0] == 3
+
+def test_search_paginates_newest_first(dao):
+    ids = [dao.add_image_metadata(f"Image {i}", "Test", f"./img/{i}.png", ["webcam"]).id for i in range(5)]
+
+    total, images = dao.search_image_metadata(offset=2, limit=2)
+
+    assert total == 5
+    assert [image.id for image in images] == [ids[2], ids[1]]